@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import asyncio
+import json
 import os
+import re
+import signal
 import subprocess
 import sys
+import tempfile
+from contextvars import ContextVar
 from urllib.parse import quote, urlparse, urlunparse
 from dataclasses import dataclass
 from pathlib import Path
@@ -13,27 +19,39 @@ from typing import Any
 # Python <=3.10: use tomli (already commonly installed via pytest deps)
 try:
     import tomllib  # type: ignore[attr-defined]
-    _toml_loads = tomllib.loads
+    _toml_load = tomllib.load
 except ModuleNotFoundError:
     import tomli  # type: ignore[import-not-found]
-    _toml_loads = tomli.loads
+    _toml_load = tomli.load
 
 
 ROOT = Path(__file__).resolve().parents[1]
 MANIFEST = ROOT / "repos.toml"
 DEPS_DIR = ROOT / "deps"
+# name -> {"ref", "url", "sha"}: the SHA each work tree was last left clean at
+STATE_FILE = DEPS_DIR / ".bootstrap_state.json"
 
-# Make git fail fast instead of hanging on interactive prompts
+# Make git fail fast instead of hanging on interactive prompts. GIT_TERMINAL_PROMPT
+# only covers the tty; the askpass no-ops stop core.askPass / an inherited GUI
+# SSH_ASKPASS from popping a dialog. Children also get stdin=DEVNULL.
 _GIT_ENV = {
     **os.environ,
     "GIT_TERMINAL_PROMPT": "0",
     "GIT_ASKPASS": "/bin/true",
+    "SSH_ASKPASS": "/bin/true",
 }
 
 # Tunables via env vars (override in setup script if desired)
 DEFAULT_TIMEOUT_S = int(os.environ.get("BOOTSTRAP_GIT_TIMEOUT_S", "1800"))  # 30 min
 CLONE_DEPTH = os.environ.get("BOOTSTRAP_CLONE_DEPTH", "1")  # "1" or "0" (0 means full)
-USE_PARTIAL_CLONE = os.environ.get("BOOTSTRAP_USE_PARTIAL_CLONE", "1") == "1"  # uses --filter=blob:none
+USE_PARTIAL_CLONE = os.environ.get("BOOTSTRAP_USE_PARTIAL_CLONE", "1") == "1"  # 0 disables --filter
+# "auto" (tree:0 for repos with sparse paths, else blob:none), "blob:none", "tree:0" or "none"
+CLONE_FILTER = os.environ.get("BOOTSTRAP_CLONE_FILTER", "auto")
+_CLONE_FILTERS = {"auto", "blob:none", "tree:0", "none"}
+if CLONE_FILTER not in _CLONE_FILTERS:
+    raise ValueError(
+        f"BOOTSTRAP_CLONE_FILTER must be one of {sorted(_CLONE_FILTERS)}, got {CLONE_FILTER!r}"
+    )
 PRESERVE_LOCAL = os.environ.get("BOOTSTRAP_PRESERVE_LOCAL", "0") == "1"  # skip reset/clean for local work
 PUSH_TOKEN_ENV_VARS = (
     "BOOTSTRAP_GIT_TOKEN",
@@ -43,20 +61,119 @@ PUSH_TOKEN_ENV_VARS = (
     "GH_TOKEN_2",
 )
 CONFIGURE_PUSH_URL = os.environ.get("BOOTSTRAP_CONFIGURE_PUSH_URL", "1") == "1"
+# First non-empty token wins; resolved once rather than per repo
+_PUSH_TOKEN = next((os.environ[k] for k in PUSH_TOKEN_ENV_VARS if os.environ.get(k)), None)
+# Repos in flight at once; BOOTSTRAP_JOBS=1 restores the strictly sequential run
+MAX_CONCURRENCY = max(
+    1, int(os.environ.get("BOOTSTRAP_JOBS") or os.environ.get("BOOTSTRAP_MAX_CONCURRENCY", "8"))
+)
+# Parallel submodule clones inside one repo (git's own --jobs)
+SUBMODULE_JOBS = os.environ.get("BOOTSTRAP_SUBMODULE_JOBS") or str(os.cpu_count() or 1)
+FAILURE_TAIL_LINES = 64  # captured git output quoted per failure in the summary
+
+# Per-repo log buffer while repos run concurrently; None means write straight through
+_TASK_LOG: ContextVar[list[str] | None] = ContextVar("_TASK_LOG", default=None)
+
+
+def probe_git_version() -> tuple[int, int, int]:
+    """Parse `git --version` once; (0, 0, 0) if git is missing or unparseable."""
+    try:
+        out = subprocess.run(
+            ["git", "--version"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout
+    except OSError:
+        return (0, 0, 0)
+    m = re.search(r"(\d+)\.(\d+)(?:\.(\d+))?", out)
+    if not m:
+        return (0, 0, 0)
+    return (int(m.group(1)), int(m.group(2)), int(m.group(3) or 0))
+
+
+# Probed once at import; capability-gated paths below pick the fastest form available
+_GIT_VERSION = probe_git_version()
+_HAS_GIT_C_DIR = _GIT_VERSION >= (1, 8, 5)  # git -C <dir>
+_HAS_SUBMODULE_JOBS = _GIT_VERSION >= (2, 9, 0)  # submodule update --jobs
+_HAS_PARTIAL_CLONE = _GIT_VERSION >= (2, 19, 0)  # --filter=blob:none
+_HAS_TREELESS_CLONE = _GIT_VERSION >= (2, 20, 0)  # --filter=tree:0
+_HAS_SPARSE_CLONE = _GIT_VERSION >= (2, 25, 0)  # clone --sparse + git sparse-checkout
+_HAS_ALSO_FILTER_SUBMODULES = _GIT_VERSION >= (2, 36, 0)  # clone --also-filter-submodules
+_HAS_CONFIG_GLOBAL = _GIT_VERSION >= (2, 32, 0)  # GIT_CONFIG_GLOBAL
+
+# --shallow-submodules can only mean depth 1, so any other fixed depth leaves the
+# submodules to `submodule update --depth`, same as the update path
+_CLONE_RECURSES_SUBMODULES = _HAS_ALSO_FILTER_SUBMODULES and CLONE_DEPTH in {"0", "1"}
+
+# Transfer defaults for every child git. Written first in the runtime config so
+# anything the user's own global config sets still wins.
+_RUNTIME_GIT_CONFIG = """\
+[http]
+\tversion = HTTP/2
+\tpostBuffer = 1073741824
+[core]
+\tcompression = 0
+"""
+# Older git has no GIT_CONFIG_GLOBAL; pass the clone-relevant defaults inline instead
+_CLONE_CONFIG_FLAGS = (
+    () if _HAS_CONFIG_GLOBAL else ("-c", "core.compression=0", "-c", "http.postBuffer=1073741824")
+)
+
+
+# slots=True needs Python 3.10+; older interpreters just get a regular frozen dataclass
+_DATACLASS_SLOTS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class RepoSpec:
     name: str
     url: str
     ref: str = "main"
+    sparse: tuple[str, ...] = ()  # cone-mode sparse-checkout paths; empty means full checkout
+
+
+def log(msg: str, end: str = "\n") -> None:
+    buf = _TASK_LOG.get()
+    if buf is not None:
+        buf.append(msg + end)
+    else:
+        print(msg, end=end, flush=True)
+
+
+def kill_tree(proc: asyncio.subprocess.Process) -> None:
+    # Children run in their own session, so the group also takes down helpers
+    # (git-remote-https, ssh, upload-pack) that would otherwise keep the pipe open
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass  # exited between the timeout firing and the kill
+
+
+async def communicate(proc: asyncio.subprocess.Process, cmd: list[str], timeout_s: int) -> bytes:
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        kill_tree(proc)
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout_s) from None
+    except BaseException:
+        # Ctrl-C no longer reaches the child's session; don't leave it running
+        kill_tree(proc)
+        raise
+    return out or b""
 
 
-def log(msg: str) -> None:
-    print(msg, flush=True)
+def with_git_dir(cmd: list[str], cwd: Path) -> list[str]:
+    # `git -C <dir>` lets the child resolve the repo itself, so no chdir per spawn
+    return ["git", "-C", str(cwd), *cmd[1:]]
 
 
-def run(
+async def run(
     cmd: list[str],
     *,
     cwd: Path | None = None,
@@ -64,23 +181,38 @@ def run(
     env: dict[str, str] | None = None,
     log_cmd: list[str] | None = None,
 ) -> None:
+    if cwd is not None and cmd[0] == "git" and _HAS_GIT_C_DIR:
+        cmd = with_git_dir(cmd, cwd)
+        log_cmd = with_git_dir(log_cmd, cwd) if log_cmd else None
+        cwd = None
     where = f" (cwd={cwd})" if cwd else ""
     log(f"+ {' '.join(log_cmd or cmd)}{where}")
-    subprocess.run(
-        cmd,
+
+    # Sequential runs stream git straight to the terminal; concurrent ones capture
+    # it into the repo's buffer so output from different repos never interleaves.
+    buffered = _TASK_LOG.get() is not None
+    pipe = asyncio.subprocess.PIPE if buffered else None
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
         cwd=str(cwd) if cwd else None,
-        check=True,
-        timeout=timeout_s,
         env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=pipe,
+        stderr=asyncio.subprocess.STDOUT if buffered else None,
+        start_new_session=True,
     )
+    out = await communicate(proc, log_cmd or cmd, timeout_s)
+    lines = out.decode(errors="replace").rstrip().splitlines() if out else []
+    if lines:
+        log("\n".join(lines))
+
+    if proc.returncode:
+        tail = "\n".join(lines[-FAILURE_TAIL_LINES:])
+        raise subprocess.CalledProcessError(proc.returncode, log_cmd or cmd, output=tail)
 
 
 def resolve_push_token() -> str | None:
-    for key in PUSH_TOKEN_ENV_VARS:
-        value = os.environ.get(key)
-        if value:
-            return value
-    return None
+    return _PUSH_TOKEN
 
 
 def build_push_url(url: str, token: str) -> str | None:
@@ -92,7 +224,7 @@ def build_push_url(url: str, token: str) -> str | None:
     return urlunparse(parsed._replace(netloc=f"{userinfo}@{netloc}"))
 
 
-def configure_push_url(spec: RepoSpec) -> None:
+async def configure_push_url(spec: RepoSpec, dest: Path, current: str | None = None) -> None:
     if not CONFIGURE_PUSH_URL:
         return
     token = resolve_push_token()
@@ -102,71 +234,201 @@ def configure_push_url(spec: RepoSpec) -> None:
     if not push_url:
         log(f"Skipping push URL config for {spec.name}; unsupported URL scheme.")
         return
+    if push_url == current:
+        return
     redacted = push_url.replace(token, "****")
-    run(
+    await run(
         ["git", "remote", "set-url", "--push", "origin", push_url],
-        cwd=repo_dir(spec),
+        cwd=dest,
         env=_GIT_ENV,
         log_cmd=["git", "remote", "set-url", "--push", "origin", redacted],
     )
     log(f"Configured push URL for {spec.name} (token from env).")
 
 
+def user_global_configs() -> list[Path]:
+    explicit = os.environ.get("GIT_CONFIG_GLOBAL")
+    if explicit:
+        return [Path(explicit)]
+    xdg = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+    # Same precedence git uses: XDG first, then ~/.gitconfig
+    return [xdg / "git" / "config", Path.home() / ".gitconfig"]
+
+
+def configure_git_runtime() -> Path | None:
+    """Point child gits at a temp global config: our defaults, then the user's own.
+
+    Returns the file for the caller to remove, or None on git without GIT_CONFIG_GLOBAL.
+    """
+    if not _HAS_CONFIG_GLOBAL:
+        return None
+    fd, name = tempfile.mkstemp(prefix="bootstrap-gitconfig-")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(_RUNTIME_GIT_CONFIG)
+        for path in user_global_configs():
+            if path.is_file():
+                quoted = str(path).replace("\\", "\\\\").replace('"', '\\"')
+                fh.write(f'[include]\n\tpath = "{quoted}"\n')
+    _GIT_ENV["GIT_CONFIG_GLOBAL"] = name
+    return Path(name)
+
+
 def load_manifest() -> list[RepoSpec]:
     if not MANIFEST.exists():
         raise FileNotFoundError(f"Missing manifest: {MANIFEST}")
 
-    data: dict[str, Any] = _toml_loads(MANIFEST.read_text(encoding="utf-8"))
+    # The parser works on bytes; handing it the binary file skips a str decode + copy
+    with MANIFEST.open("rb") as fh:
+        data: dict[str, Any] = _toml_load(fh)
     repos = data.get("repo", [])
     if not isinstance(repos, list) or not repos:
         raise ValueError("repos.toml must contain at least one [[repo]] entry")
 
-    specs: list[RepoSpec] = []
-    for r in repos:
-        if not isinstance(r, dict):
-            raise ValueError(f"Invalid [[repo]] entry (not a table): {r!r}")
-        if "name" not in r or "url" not in r:
-            raise ValueError(f"Invalid [[repo]] entry (needs name + url): {r!r}")
-        name = str(r["name"])
-        url = str(r["url"])
-        ref = str(r.get("ref", "main"))
-        specs.append(RepoSpec(name=name, url=url, ref=ref))
+    specs = [parse_repo_entry(r) for r in repos]
+    # Repos run concurrently, so two entries sharing deps/<name> would race each other
+    seen: set[str] = set()
+    for spec in specs:
+        if spec.name in seen:
+            raise ValueError(f"Duplicate [[repo]] name in repos.toml: {spec.name!r}")
+        seen.add(spec.name)
     return specs
 
 
+def parse_repo_entry(r: Any) -> RepoSpec:
+    """Validate one [[repo]] table up front so the per-repo work never re-checks it."""
+    if not isinstance(r, dict):
+        raise ValueError(f"Invalid [[repo]] entry (not a table): {r!r}")
+    if "name" not in r or "url" not in r:
+        raise ValueError(f"Invalid [[repo]] entry (needs name + url): {r!r}")
+    name, url, ref = r["name"], r["url"], r.get("ref", "main")
+    if not all(isinstance(v, str) and v for v in (name, url, ref)):
+        raise ValueError(f"Invalid [[repo]] entry (name, url and ref must be non-empty strings): {r!r}")
+    sparse = r.get("sparse", [])
+    if not isinstance(sparse, list) or not all(isinstance(p, str) for p in sparse):
+        raise ValueError(f"Invalid [[repo]] entry (sparse must be a list of paths): {r!r}")
+    return RepoSpec(name=name, url=url, ref=ref, sparse=tuple(sparse))
+
+
 def repo_dir(spec: RepoSpec) -> Path:
     return DEPS_DIR / spec.name
 
 
-def is_git_repo(path: Path) -> bool:
-    return (path / ".git").exists()
+def probe_repo(path: Path) -> tuple[bool, bool]:
+    """Return (is_git_repo, has_submodules) from a single directory listing."""
+    try:
+        with os.scandir(path) as it:
+            names = {entry.name for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return (False, False)
+    return (".git" in names, ".gitmodules" in names)
+
+
+async def capture(
+    cmd: list[str], *, cwd: Path | None = None, timeout_s: int = DEFAULT_TIMEOUT_S
+) -> tuple[int, str]:
+    """Run a quiet git probe and return (returncode, stdout); only raises on timeout."""
+    if cwd is not None and _HAS_GIT_C_DIR:
+        cmd, cwd = with_git_dir(cmd, cwd), None
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=str(cwd) if cwd else None,
+        env=_GIT_ENV,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    out = await communicate(proc, cmd, timeout_s)
+    return proc.returncode or 0, out.decode(errors="replace")
 
 
-def has_submodules(path: Path) -> bool:
-    return (path / ".gitmodules").exists()
+async def is_dirty_repo(path: Path) -> bool:
+    # Untracked files count: a clean pass would `git clean` them away. --porcelain
+    # already leaves ignored files out, so build output doesn't count as dirty.
+    # Plain --porcelain is v1 on every git (=v1 needs 2.11). If status fails we
+    # can't tell, so assume dirty rather than let reset/clean run over local work.
+    code, out = await capture(["git", "status", "-z", "--porcelain"], cwd=path)
+    return code != 0 or any(entry for entry in out.split("\0"))
 
 
-def is_dirty_repo(path: Path) -> bool:
-    result = subprocess.run(
-        ["git", "status", "--porcelain"],
-        cwd=str(path),
-        stdout=subprocess.PIPE,
-        text=True,
-        env=_GIT_ENV,
-        check=False,
-    )
-    return bool(result.stdout.strip())
+async def resolve_shas(path: Path, *revs: str) -> tuple[str | None, ...]:
+    # One rev-parse process answers every rev; any unresolvable rev voids the lot
+    code, out = await capture(["git", "rev-parse", *revs], cwd=path)
+    shas = out.split()
+    if code != 0 or len(shas) != len(revs):
+        return (None,) * len(revs)
+    return tuple(shas)
 
 
-def clone_repo(spec: RepoSpec) -> None:
-    dest = repo_dir(spec)
+def load_state() -> dict[str, dict[str, str]]:
+    try:
+        with STATE_FILE.open("rb") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(state: dict[str, dict[str, str]]) -> None:
+    if not state:
+        # Nothing finished clean: just drop any stale record, never create deps/ for it
+        STATE_FILE.unlink(missing_ok=True)
+        return
+    # Write-then-rename so an interrupted run never leaves a truncated file behind
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, STATE_FILE)
+
+
+def known_sha(state: dict[str, dict[str, str]], spec: RepoSpec) -> str | None:
+    """SHA the work tree was last left clean at, if recorded for this same url + ref."""
+    entry = state.get(spec.name)
+    if not isinstance(entry, dict) or (entry.get("url"), entry.get("ref")) != (spec.url, spec.ref):
+        return None
+    return entry.get("sha") or None
+
+
+def clone_filter_for(spec: RepoSpec) -> str | None:
+    if not USE_PARTIAL_CLONE or CLONE_FILTER == "none" or not _HAS_PARTIAL_CLONE:
+        return None
+    if CLONE_FILTER == "auto":
+        # Treeless clones only pay off when sparse-checkout skips most of the tree;
+        # a full checkout would fetch every tree lazily, one round-trip at a time.
+        return "tree:0" if sparse_paths(spec) else "blob:none"
+    if CLONE_FILTER == "tree:0" and not _HAS_TREELESS_CLONE:
+        return "blob:none"
+    return CLONE_FILTER
+
+
+def sparse_paths(spec: RepoSpec) -> tuple[str, ...]:
+    # Older git has no `sparse-checkout`; those clones fall back to a full checkout
+    return spec.sparse if _HAS_SPARSE_CLONE else ()
+
+
+async def clone_repo(spec: RepoSpec, dest: Path) -> str | None:
     DEPS_DIR.mkdir(parents=True, exist_ok=True)
 
-    cmd: list[str] = ["git", "clone"]
+    cmd: list[str] = ["git", *_CLONE_CONFIG_FLAGS, "clone"]
 
     # Partial clone speeds things up; can be disabled if it causes trouble
-    if USE_PARTIAL_CLONE:
-        cmd += ["--filter=blob:none"]
+    clone_filter = clone_filter_for(spec)
+    if clone_filter:
+        cmd += [f"--filter={clone_filter}"]
+
+    # Start from the top-level files only; the sparse paths are added below
+    sparse = sparse_paths(spec)
+    if sparse:
+        cmd += ["--sparse"]
+
+    # Pull submodules in the same pass, keeping the partial-clone filter for them
+    if _CLONE_RECURSES_SUBMODULES:
+        cmd += ["--recurse-submodules"]
+        if clone_filter:
+            cmd += ["--also-filter-submodules"]
+        if CLONE_DEPTH == "1":
+            cmd += ["--shallow-submodules"]
+        cmd += ["--jobs", SUBMODULE_JOBS]
 
     # Depth=1 for speed; set BOOTSTRAP_CLONE_DEPTH=0 for full history
     if CLONE_DEPTH != "0":
@@ -174,71 +436,235 @@ def clone_repo(spec: RepoSpec) -> None:
 
     # Single branch checkout for the requested ref
     cmd += ["--single-branch", "--branch", spec.ref, spec.url, str(dest)]
-    run(cmd, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+    await run(cmd, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+    if sparse:
+        # clone --sparse only defaults to cone mode from git 2.37; before that `set`
+        # would write gitignore-style patterns instead of directory paths
+        await run(["git", "sparse-checkout", "init", "--cone"], cwd=dest, env=_GIT_ENV)
+        await run(["git", "sparse-checkout", "set", *sparse], cwd=dest, env=_GIT_ENV)
+    (head,) = await resolve_shas(dest, "HEAD")
+    return head
+
+
+async def read_remote_urls(path: Path) -> dict[str, str]:
+    _, out = await capture(
+        ["git", "config", "--get-regexp", r"^remote\.origin\.(push)?url$"], cwd=path
+    )
+    urls: dict[str, str] = {}
+    for line in out.splitlines():
+        key, _, value = line.partition(" ")
+        urls.setdefault(key, value)
+    return urls
 
 
-def update_repo(spec: RepoSpec) -> None:
-    dest = repo_dir(spec)
+async def ensure_remote_urls(spec: RepoSpec, dest: Path) -> None:
+    # One config read; the set-url writes only run when repos.toml or the token changed
+    urls = await read_remote_urls(dest)
+    if urls.get("remote.origin.url") != spec.url:
+        await run(["git", "remote", "set-url", "origin", spec.url], cwd=dest, env=_GIT_ENV)
+    await configure_push_url(spec, dest, current=urls.get("remote.origin.pushurl"))
 
-    # Keep origin URL correct in case you changed it in repos.toml
-    run(["git", "remote", "set-url", "origin", spec.url], cwd=dest, env=_GIT_ENV)
+
+async def fetch_origin(spec: RepoSpec, dest: Path) -> None:
+    # Keep origin URLs correct in case you changed them in repos.toml
+    await ensure_remote_urls(spec, dest)
 
     # Fetch latest for the branch (depth-limited if requested)
-    fetch_cmd = ["git", "fetch", "--prune"]
+    fetch_cmd = ["git", "fetch", "--prune", "--recurse-submodules=on-demand"]
     if CLONE_DEPTH != "0":
         fetch_cmd += ["--depth", CLONE_DEPTH]
     fetch_cmd += ["origin", spec.ref]
-    run(fetch_cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+    await run(fetch_cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+
 
-    if PRESERVE_LOCAL or is_dirty_repo(dest):
+async def is_unchanged(spec: RepoSpec, dest: Path, known: str) -> bool:
+    """True if upstream and HEAD both still sit at the SHA we last left the tree at."""
+    # ls-remote is one small round-trip with no object transfer; the local HEAD
+    # lookup rides along with it
+    (code, out), (head,) = await asyncio.gather(
+        capture(["git", "ls-remote", "--exit-code", spec.url, f"refs/heads/{spec.ref}"]),
+        resolve_shas(dest, "HEAD"),
+    )
+    remote = out.split()[0] if code == 0 and out.strip() else None
+    return remote == known == head
+
+
+async def update_repo(
+    spec: RepoSpec, dest: Path, known: str | None, has_submodules: bool
+) -> tuple[str | None, bool, bool]:
+    """Bring dest to origin/<ref>.
+
+    has_submodules is what the caller's listing saw. Returns (sha the tree is now
+    known clean at, or None; has_submodules after any reset; whether submodule
+    URLs were already synced).
+    """
+    if PRESERVE_LOCAL:
+        await fetch_origin(spec, dest)
         log(f"Skipping reset/clean for {spec.name} (preserve local work).")
-        return
+        # The tree was not touched, so whatever we recorded last time still holds
+        return known, has_submodules, False
+
+    # A recorded SHA means the tree was left clean there, so the dirty check can
+    # wait until we know it matters. Without one, it only reads the work tree and
+    # overlaps the fetch (set-url stays ahead of the fetch so a changed URL is the
+    # one fetched).
+    dirty: bool | None = None
+    if known is None:
+        _, dirty = await asyncio.gather(fetch_origin(spec, dest), is_dirty_repo(dest))
+    else:
+        await fetch_origin(spec, dest)
+
+    head, origin = await resolve_shas(dest, "HEAD", f"origin/{spec.ref}")
+    if head is not None and head == origin:
+        # Left clean at this very SHA last time: no need to ask git status
+        if known != origin and dirty is None:
+            dirty = await is_dirty_repo(dest)
+        if not dirty:
+            log(f"{spec.name} already at origin/{spec.ref}; skipping reset/clean.")
+            return origin, has_submodules, False
+    elif dirty is None:
+        dirty = await is_dirty_repo(dest)
+
+    if dirty:
+        log(f"Skipping reset/clean for {spec.name} (preserve local work).")
+        return None, has_submodules, False
 
     # Hard reset to origin/<ref> so repeated runs are deterministic
-    run(["git", "reset", "--hard", f"origin/{spec.ref}"], cwd=dest, env=_GIT_ENV)
+    await run(["git", "reset", "--hard", f"origin/{spec.ref}"], cwd=dest, env=_GIT_ENV)
+
+    # Listed again: the reset can add or drop .gitmodules
+    has_submodules = probe_repo(dest)[1]
+
+    # Remove untracked files from previous runs (keeps workspace clean). Submodule
+    # sync only reads the now-reset .gitmodules and writes .git/config, neither of
+    # which clean touches, so it rides along when output is buffered. Streaming
+    # runs keep them in turn so their output doesn't interleave on the terminal.
+    clean_cmd = ["git", "clean", "-ffd"]
+    if has_submodules and _TASK_LOG.get() is not None:
+        await asyncio.gather(run(clean_cmd, cwd=dest, env=_GIT_ENV), sync_submodules(dest))
+    else:
+        await run(clean_cmd, cwd=dest, env=_GIT_ENV)
+        if has_submodules:
+            await sync_submodules(dest)
+    return origin, has_submodules, has_submodules
 
-    # Remove untracked files from previous runs (keeps workspace clean)
-    run(["git", "clean", "-ffd"], cwd=dest, env=_GIT_ENV)
 
+async def sync_submodules(dest: Path) -> None:
+    await run(["git", "submodule", "sync", "--recursive"], cwd=dest, env=_GIT_ENV)
 
-def update_submodules_if_any(spec: RepoSpec) -> None:
-    dest = repo_dir(spec)
-    if not has_submodules(dest):
+
+async def update_submodules_if_any(
+    spec: RepoSpec, dest: Path, has_submodules: bool, *, synced: bool = False
+) -> None:
+    if not has_submodules:
         return
 
     log(f"--- submodules: {spec.name} ---")
-    run(["git", "submodule", "sync", "--recursive"], cwd=dest, env=_GIT_ENV)
+    if not synced:
+        await sync_submodules(dest)
 
     cmd = ["git", "submodule", "update", "--init", "--recursive"]
+    if _HAS_SUBMODULE_JOBS:
+        cmd += ["--jobs", SUBMODULE_JOBS]
     if CLONE_DEPTH != "0":
         cmd += ["--depth", CLONE_DEPTH]
-    run(cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+    await run(cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
 
 
-def ensure_repo(spec: RepoSpec) -> None:
+async def ensure_repo(spec: RepoSpec, known: str | None = None) -> str | None:
+    """Clone or refresh one repo; returns the SHA its tree is now known clean at."""
     dest = repo_dir(spec)
-    log(f"\n=== {spec.name} @ {spec.ref} ===")
-    log(f"URL : {spec.url}")
-    log(f"DEST: {dest}")
-
-    if not is_git_repo(dest):
-        clone_repo(spec)
+    log(f"\n=== {spec.name} @ {spec.ref} ===\nURL : {spec.url}\nDEST: {dest}\n", end="")
+
+    is_git_repo, has_submodules = probe_repo(dest)
+    if not is_git_repo:
+        sha = await clone_repo(spec, dest)
+        await configure_push_url(spec, dest)
+        # Recent git already initialised submodules during the clone
+        if not _CLONE_RECURSES_SUBMODULES:
+            await update_submodules_if_any(spec, dest, probe_repo(dest)[1])
+    elif known and not PRESERVE_LOCAL and await is_unchanged(spec, dest, known):
+        # Nothing moved since the last clean pass: no fetch, reset, clean or submodules.
+        # Local edits since then would have blocked the reset anyway.
+        log(f"{spec.name} unchanged upstream at {known[:12]}; nothing to do.")
+        await ensure_remote_urls(spec, dest)  # a new push token still gets applied
+        sha = known
     else:
-        update_repo(spec)
+        sha, has_submodules, synced = await update_repo(spec, dest, known, has_submodules)
+        await update_submodules_if_any(spec, dest, has_submodules, synced=synced)
 
-    configure_push_url(spec)
-    update_submodules_if_any(spec)
     log(f"=== OK {spec.name} ===")
+    return sha
+
+
+def describe_failure(spec: RepoSpec, exc: BaseException) -> str:
+    if isinstance(exc, subprocess.TimeoutExpired):
+        return f"{spec.name}: TIMEOUT running {' '.join(exc.cmd) if exc.cmd else 'git'}"
+    if isinstance(exc, subprocess.CalledProcessError):
+        summary = f"{spec.name}: FAILED (exit {exc.returncode}) running: {' '.join(exc.cmd)}"
+        if exc.output:
+            summary += "".join(f"\n     | {line}".rstrip() for line in exc.output.splitlines())
+        return summary
+    return f"{spec.name}: ERROR {type(exc).__name__}: {exc}"
+
+
+async def _drive(
+    specs: list[RepoSpec], state: dict[str, dict[str, str]]
+) -> list[str | BaseException | None]:
+    if MAX_CONCURRENCY == 1:
+        results: list[str | BaseException | None] = []
+        for spec in specs:
+            try:
+                results.append(await ensure_repo(spec, known_sha(state, spec)))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # Bound the number of repos (and so open git connections) in flight
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    # Buffers go out in spec order: a finished repo waits for those ahead of it,
+    # so the log reads the same as a sequential run whatever the finishing order
+    bufs: list[list[str] | None] = [None] * len(specs)
+    next_flush = 0
+
+    def flush_ready() -> None:
+        nonlocal next_flush
+        while next_flush < len(bufs) and bufs[next_flush] is not None:
+            sys.stdout.write("".join(bufs[next_flush] or ()))
+            bufs[next_flush] = []  # release the text; [] still reads as flushed
+            next_flush += 1
+        sys.stdout.flush()
+
+    async def bounded(i: int, spec: RepoSpec) -> str | None:
+        async with sem:
+            # Each gather() task runs in its own context copy, so the buffer is per repo.
+            # Flushing has no await in it, so each block lands in one piece.
+            buf: list[str] = []
+            _TASK_LOG.set(buf)
+            try:
+                return await ensure_repo(spec, known_sha(state, spec))
+            finally:
+                _TASK_LOG.set(None)
+                bufs[i] = buf
+                flush_ready()
+
+    return await asyncio.gather(
+        *(bounded(i, s) for i, s in enumerate(specs)), return_exceptions=True
+    )
 
 
 def main() -> int:
     log(f"Python: {sys.executable}")
     log(f"Version: {sys.version.split()[0]}")
+    log(f"Git: {'.'.join(map(str, _GIT_VERSION))}")
     log(f"Root: {ROOT}")
     log(f"Manifest: {MANIFEST}")
     log(f"Deps dir: {DEPS_DIR}")
-    log(f"Timeout: {DEFAULT_TIMEOUT_S}s | Depth: {CLONE_DEPTH} | Partial: {USE_PARTIAL_CLONE}")
-    log(f"Preserve local: {PRESERVE_LOCAL}")
+    log(
+        f"Timeout: {DEFAULT_TIMEOUT_S}s | Depth: {CLONE_DEPTH} | Partial: {USE_PARTIAL_CLONE}"
+        f" | Filter: {CLONE_FILTER}"
+    )
+    log(f"Preserve local: {PRESERVE_LOCAL} | Concurrency: {MAX_CONCURRENCY}")
 
     try:
         specs = load_manifest()
@@ -246,29 +672,47 @@ def main() -> int:
         log(f"ERROR: {e}")
         return 2
 
+    # Deterministic order for stable logs and summary
+    specs = sorted(specs, key=lambda s: s.name)
+    state = load_state()
+    runtime_config = configure_git_runtime()
+    try:
+        results = asyncio.run(_drive(specs, state))
+    finally:
+        if runtime_config:
+            runtime_config.unlink(missing_ok=True)
+
+    # Only repos that finished clean are remembered; failures re-check next run.
+    # The state is only a shortcut, so failing to write it must not cost the summary.
+    try:
+        save_state({
+            spec.name: {"ref": spec.ref, "url": spec.url, "sha": result}
+            for spec, result in zip(specs, results)
+            if isinstance(result, str)
+        })
+    except OSError as e:
+        log(f"WARNING: could not save {STATE_FILE}: {e}")
+
     # Continue-on-failure and summarize at end
-    failures: list[str] = []
-
-    # Deterministic order for stable logs
-    for spec in sorted(specs, key=lambda s: s.name):
-        try:
-            ensure_repo(spec)
-        except subprocess.TimeoutExpired as e:
-            failures.append(f"{spec.name}: TIMEOUT running {' '.join(e.cmd) if e.cmd else 'git'}")
-        except subprocess.CalledProcessError as e:
-            failures.append(f"{spec.name}: FAILED (exit {e.returncode}) running: {' '.join(e.cmd)}")
-        except Exception as e:
-            failures.append(f"{spec.name}: ERROR {type(e).__name__}: {e}")
+    failures = [
+        describe_failure(spec, result)
+        for spec, result in zip(specs, results)
+        if isinstance(result, BaseException)
+    ]
 
+    # Summary goes out as one write so it stays contiguous in CI logs
     if failures:
-        log("\n=== BOOTSTRAP SUMMARY: PARTIAL FAILURE ===")
-        for f in failures:
-            log(f" - {f}")
-        log(f"\nWorkspace is partial. See deps/: {DEPS_DIR}")
+        summary = "\n".join(f" - {f}" for f in failures)
+        sys.stdout.write(
+            "\n=== BOOTSTRAP SUMMARY: PARTIAL FAILURE ===\n"
+            f"{summary}\n"
+            f"\nWorkspace is partial. See deps/: {DEPS_DIR}\n"
+        )
+        sys.stdout.flush()
         return 4
 
-    log("\n=== BOOTSTRAP SUMMARY: SUCCESS ===")
-    log(f"Workspace ready: {DEPS_DIR}")
+    sys.stdout.write(f"\n=== BOOTSTRAP SUMMARY: SUCCESS ===\nWorkspace ready: {DEPS_DIR}\n")
+    sys.stdout.flush()
     return 0
 
 